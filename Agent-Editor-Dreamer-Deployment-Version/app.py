@@ -5,9 +5,12 @@
 
 import os
 import logging
+import sqlite3
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import DeclarativeBase
 from dotenv import load_dotenv
 
@@ -35,19 +38,32 @@ app.config["CORS_RESOURCES"] = {r"/*": {"origins": "*"}}
 
 # Add these lines to configure allowed file extensions and uploads folder
 app.config["ALLOWED_EXTENSIONS"] = {"pdf", "docx"}
-app.config["UPLOAD_FOLDER"] = os.path.join(
-    os.path.dirname(os.path.abspath(__file__)), "uploads"
+# Point these at shared storage (e.g. an NFS mount) when running on several hosts
+app.config["UPLOAD_FOLDER"] = os.getenv(
+    "UPLOAD_FOLDER", os.path.join(os.path.dirname(os.path.abspath(__file__)), "uploads")
 )
 if not os.path.exists(app.config["UPLOAD_FOLDER"]):
     os.makedirs(app.config["UPLOAD_FOLDER"])
 
 # Add these lines to configure the debug directory
-app.config["DEBUG_DIR"] = os.path.join(app.root_path, "debug")
+app.config["DEBUG_DIR"] = os.getenv("DEBUG_DIR", os.path.join(app.root_path, "debug"))
 if not os.path.exists(app.config["DEBUG_DIR"]):
     os.makedirs(app.config["DEBUG_DIR"])
 
 # Configure max upload size
-app.config["MAX_CONTENT_LENGTH"] = 20 * 1024 * 1024  # 20MB max file size
+app.config["MAX_CONTENT_LENGTH"] = 20 * 1024 * 1024  # 20MB max single request
+
+# Log per-request peak RSS of upload and analysis requests (Linux only).
+# Diagnostic; run with a single sync worker when enabling it.
+app.config["LOG_PEAK_RSS"] = os.getenv("LOG_PEAK_RSS", "").lower() in ("1", "true", "yes")
+
+# Configure resumable chunked uploads; each chunk must fit in MAX_CONTENT_LENGTH
+app.config["CHUNK_SIZE"] = 5 * 1024 * 1024  # 5MB per chunk
+app.config["MAX_UPLOAD_SIZE"] = 100 * 1024 * 1024  # 100MB max chunked file size
+app.config["CHUNKED_UPLOAD_TTL"] = 24 * 60 * 60  # Abandoned uploads expire after a day
+app.config["CHUNKED_UPLOAD_FOLDER"] = os.path.join(app.config["UPLOAD_FOLDER"], "chunks")
+if not os.path.exists(app.config["CHUNKED_UPLOAD_FOLDER"]):
+    os.makedirs(app.config["CHUNKED_UPLOAD_FOLDER"])
 
 
 # Add these lines to configure the OpenAI model parameters
@@ -55,6 +71,14 @@ app.config["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
 app.config["OPENAI_MODEL_NAME"] = "gpt-4o"
 app.config["OPENAI_TEMPERATURE"] = 0.7
 app.config["OPENAI_MAX_TOKENS"] = 4096
+# Seconds per OpenAI attempt, and how many times a failed attempt is retried
+app.config["OPENAI_TIMEOUT"] = 180
+app.config["OPENAI_MAX_RETRIES"] = 2
+# Seconds an analysis may hold its per-payment lock before another request can
+# retry; longer than every OpenAI attempt timing out, plus time to store the result
+app.config["ANALYSIS_LOCK_TTL"] = (
+    app.config["OPENAI_TIMEOUT"] * (app.config["OPENAI_MAX_RETRIES"] + 1) + 60
+)
 
 # app.py
 
@@ -69,6 +93,11 @@ app.config["PRICING_TIERS"] = [
 ]
 app.config["MIN_CHARGE"] = 350  # ¥3.50 in cents
 
+# Longest document text accepted for analysis. The whole text goes to the
+# model in one request, so this keeps text plus prompt and a 4096-token reply
+# inside GPT-4o's 128k-token context (CJK text is about one token per char).
+app.config["MAX_ANALYSIS_CHARS"] = 110000
+
 # Use a strong secret key
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", os.urandom(24))
 
@@ -83,6 +112,18 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     "pool_size": 10,
     "max_overflow": 20,
 }
+# How long a SQLite writer waits for a lock held by another worker
+app.config["SQLITE_BUSY_TIMEOUT_MS"] = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+if app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"]["connect_args"] = {
+        "timeout": app.config["SQLITE_BUSY_TIMEOUT_MS"] / 1000
+    }
+
+# Configure the cross-worker shared state backend (caches, counters, job state)
+app.config["SHARED_STATE_URL"] = os.getenv(
+    "SHARED_STATE_URL",
+    "sqlite:///" + os.path.join(app.instance_path, "shared_state.db"),
+)
 
 # Configure Stripe keys
 app.config["STRIPE_SECRET_KEY"] = os.getenv("STRIPE_SECRET_KEY")
@@ -94,6 +135,16 @@ db = SQLAlchemy(model_class=Base)
 db.init_app(app)
 migrate = Migrate(app, db)
 
+from utils.shared_state import apply_sqlite_pragmas  # noqa
+
+
+@event.listens_for(Engine, "connect")
+def _configure_sqlite_connection(dbapi_connection, connection_record):
+    """Enable WAL and the busy timeout on every new SQLite connection."""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        apply_sqlite_pragmas(dbapi_connection, app.config["SQLITE_BUSY_TIMEOUT_MS"])
+
+
 # Import routes after app initialization
 from routes import *  # noqa
 
@@ -3,6 +3,9 @@
 @filepath models.py
 """
 
+import json
+import secrets
+import zlib
 from datetime import datetime, timezone
 from app import db
 
@@ -22,6 +25,9 @@ class Document(db.Model):
     analysis_cost = db.Column(db.Integer, nullable=True)  # Analysis cost in cents
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     text_content_file_path = db.Column(db.String(255), nullable=False)
+    content_hash = db.Column(
+        db.String(64), nullable=True, index=True
+    )  # SHA-256 of the uploaded file, used to skip re-extraction of repeats
 
 
 class Payment(db.Model):
@@ -35,3 +41,82 @@ class Payment(db.Model):
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     document_id = db.Column(db.Integer, db.ForeignKey("document.id"), nullable=False)
     document = db.relationship("Document", backref=db.backref("payments", lazy=True))
+
+
+class AnalysisResult(db.Model):
+    """Model representing a finished AI analysis paid for by a payment."""
+
+    id = db.Column(db.Integer, primary_key=True)
+    document_id = db.Column(db.Integer, db.ForeignKey("document.id"), nullable=False)
+    payment_id = db.Column(
+        db.Integer, db.ForeignKey("payment.id"), unique=True, nullable=False
+    )
+    access_token = db.Column(
+        db.String(64),
+        unique=True,
+        nullable=False,
+        default=lambda: secrets.token_urlsafe(32),
+    )  # Random token the paying client uses to fetch the result again
+    model_name = db.Column(db.String(100), nullable=False)
+    temperature = db.Column(db.Float, nullable=False)
+    max_tokens = db.Column(db.Integer, nullable=False)
+    analysis_options = db.Column(db.Text, nullable=True)  # JSON-encoded options
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    document = db.relationship(
+        "Document", backref=db.backref("analysis_results", lazy=True)
+    )
+    payment = db.relationship(
+        "Payment", backref=db.backref("analysis_result", uselist=False)
+    )
+    sections = db.relationship(
+        "AnalysisSection",
+        order_by="AnalysisSection.position",
+        cascade="all, delete-orphan",
+        lazy="selectin",
+    )
+
+    @property
+    def summary(self):
+        """Rebuild the full analysis text from its sections."""
+        return "\n\n".join(
+            f"{section.name}：\n{section.content}" if section.name else section.content
+            for section in self.sections
+        )
+
+    def to_dict(self):
+        """Serialize the result in the shape returned by /payment/success."""
+        return {
+            "analysis": {
+                "summary": self.summary,
+                "sections": [
+                    {"name": section.name, "content": section.content}
+                    for section in self.sections
+                ],
+            },
+            "document_id": self.document_id,
+            "model": self.model_name,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "analysis_options": json.loads(self.analysis_options or "{}"),
+            "created_at": self.created_at.isoformat(),
+        }
+
+
+class AnalysisSection(db.Model):
+    """Model representing one section of an analysis, stored zlib-compressed."""
+
+    id = db.Column(db.Integer, primary_key=True)
+    analysis_result_id = db.Column(
+        db.Integer, db.ForeignKey("analysis_result.id"), nullable=False
+    )
+    position = db.Column(db.Integer, nullable=False)  # Order within the analysis
+    name = db.Column(db.String(50), nullable=False)  # e.g. 摘要, empty for preamble
+    compressed_content = db.Column(db.LargeBinary, nullable=False)
+
+    @property
+    def content(self):
+        return zlib.decompress(self.compressed_content).decode("utf-8")
+
+    @content.setter
+    def content(self, value):
+        self.compressed_content = zlib.compress(value.encode("utf-8"))
@@ -17,15 +17,32 @@ The module integrates with:
 """
 
 import os
+import re
 import uuid
-from typing import Tuple, Dict, Any
+import hashlib
+import hmac
+import json
+from typing import Tuple, Dict, Any, Optional
 from datetime import datetime
-from flask import render_template, request, jsonify, Response
+from flask import render_template, request, jsonify, Response, g
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import lazyload
 from werkzeug.datastructures import FileStorage
 from app import app, db
-from models import Document, Payment
+from models import Document, Payment, AnalysisResult, AnalysisSection
 from utils.document_processor import process_document
 from utils.ai_analyzer import analyze_document
+from utils.chunked_upload import (
+    ChunkedUploadError,
+    ChecksumMismatchError,
+    create_upload,
+    get_upload,
+    received_chunks,
+    write_chunk,
+    assemble_upload,
+    discard_upload,
+)
+from utils.shared_state import get_shared_state
 from utils.stripe_utils import (
     create_payment_intent,
     confirm_payment_intent,
@@ -34,10 +51,11 @@ from utils.stripe_utils import (
 # define allowed file extensions
 ALLOWED_EXTENSIONS = {"pdf", "docx"}
 
-# define upload folder
-UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "uploads")
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
+# Endpoints that hold whole documents in memory; with LOG_PEAK_RSS enabled
+# their peak RSS is logged on Linux, where a process can reset its recorded peak
+PROC_CLEAR_REFS = "/proc/self/clear_refs"
+PROC_STATUS = "/proc/self/status"
+MEMORY_TRACKED_ENDPOINTS = {"upload_file", "complete_chunked_upload", "payment_success"}
 
 # Pricing tiers in Chinese Yuan (CNY), stored in cents
 PRICING_TIERS = [
@@ -103,6 +121,186 @@ def _save_uploaded_file(file: FileStorage, save_path: str) -> None:
         raise OSError(f"Failed to save file: {str(e)}")
 
 
+def _compute_file_hash(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Compute the SHA-256 hex digest of a file without loading it into memory.
+
+    Args:
+        file_path: Path to the file to hash
+        chunk_size: Number of bytes read per iteration
+
+    Returns:
+        str: Lowercase hex digest
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _find_extracted_document(content_hash: str) -> Optional[Document]:
+    """
+    Find a previously uploaded document with the same content whose
+    extracted text is still available on disk.
+
+    Args:
+        content_hash: SHA-256 hex digest of the file content
+
+    Returns:
+        Optional[Document]: The most recent matching document, or None
+    """
+    document = (
+        Document.query.filter_by(content_hash=content_hash)
+        .order_by(Document.id.desc())
+        .first()
+    )
+    if document and os.path.exists(document.text_content_file_path):
+        return document
+    return None
+
+
+def _create_document_from_match(
+    matched_document: Document,
+    unique_filename: str,
+    original_filename: str,
+    mime_type: str,
+) -> Document:
+    """
+    Store a new Document for the caller that reuses the text extracted for an
+    earlier upload of identical content. Only the extracted text and the
+    values derived from it are shared; names and type come from the caller.
+
+    Args:
+        matched_document: Earlier document with the same content hash
+        unique_filename: Stored filename for the caller's upload
+        original_filename: Filename as provided by the caller
+        mime_type: MIME type reported by the caller
+
+    Returns:
+        Document: The caller's new document
+    """
+    document = Document(
+        filename=unique_filename,
+        original_filename=original_filename,
+        file_size=matched_document.file_size,
+        mime_type=mime_type,
+        char_count=matched_document.char_count,
+        analysis_cost=matched_document.analysis_cost,
+        title=original_filename.rsplit(".", 1)[0],
+        text_content_file_path=matched_document.text_content_file_path,
+        content_hash=matched_document.content_hash,
+    )
+    db.session.add(document)
+    db.session.commit()
+    return document
+
+
+def _document_response(document: Document) -> Dict[str, Any]:
+    """
+    Build the upload response for a document, including a fresh payment intent.
+
+    Args:
+        document: The stored document
+
+    Returns:
+        Dict containing document metadata and payment intent details
+    """
+    payment_data = _process_payment(document.analysis_cost, document.id)
+    # Use current date if metadata date fails (fallback logic)
+    upload_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    return {
+        "document_id": document.id,
+        "title": document.title,
+        "original_filename": document.original_filename,
+        "char_count": document.char_count,
+        "file_size": document.file_size,
+        "mime_type": document.mime_type,
+        "upload_date": upload_date,
+        "analysis_cost": document.analysis_cost,
+        "text_content_file_path": document.text_content_file_path,
+        **payment_data
+    }
+
+
+def _find_analysis_result(
+    document_id: int, payment_intent_id: str
+) -> Optional[AnalysisResult]:
+    """
+    Find the stored analysis paid for by a payment intent.
+
+    Args:
+        document_id: ID of the analyzed document
+        payment_intent_id: Stripe payment intent ID of the payment
+
+    Returns:
+        Optional[AnalysisResult]: The stored analysis, or None
+    """
+    return (
+        AnalysisResult.query.join(Payment)
+        .filter(
+            Payment.stripe_payment_id == payment_intent_id,
+            AnalysisResult.document_id == document_id,
+        )
+        .first()
+    )
+
+
+def _find_analysis_by_token(document_id: int, access_token: str) -> Optional[AnalysisResult]:
+    """
+    Find a stored analysis by the access token handed to the paying client.
+    Sections are loaded only when the result is serialized.
+
+    Args:
+        document_id: ID of the analyzed document
+        access_token: Token returned by /payment/success
+
+    Returns:
+        Optional[AnalysisResult]: The stored analysis, or None
+    """
+    return (
+        AnalysisResult.query.options(lazyload(AnalysisResult.sections))
+        .filter_by(document_id=document_id, access_token=access_token)
+        .first()
+    )
+
+
+def _paid_analysis_response(stored_result: AnalysisResult) -> Dict[str, Any]:
+    """
+    Build the /payment/success body, which also hands the paying client the
+    token for fetching the result again.
+
+    Args:
+        stored_result: The stored analysis
+
+    Returns:
+        Dict containing the analysis and its access token
+    """
+    return {
+        "success": True,
+        "access_token": stored_result.access_token,
+        **stored_result.to_dict(),
+    }
+
+
+def _too_long_response(char_count: int) -> Tuple[Response, int]:
+    """
+    Build the error returned for documents too long to analyze.
+
+    Args:
+        char_count: Number of characters in the document
+
+    Returns:
+        Tuple[Response, int]: JSON error response and HTTP status code
+    """
+    max_chars = app.config["MAX_ANALYSIS_CHARS"]
+    app.logger.error(f"🚫 Document too long: {char_count} > {max_chars} characters")
+    return jsonify({
+        "error": f"Document is too long to analyze ({char_count:,} characters, max {max_chars:,})"
+    }), 400
+
+
 def _calculate_analysis_cost(char_count: int) -> int:
     """
     Calculate the analysis cost based on character count.
@@ -127,18 +325,19 @@ def _calculate_analysis_cost(char_count: int) -> int:
     return max(cost, min_charge)
 
 
-def _process_payment(amount: int, currency: str = "cny") -> Dict[str, Any]:
+def _process_payment(amount: int, document_id: int, currency: str = "cny") -> Dict[str, Any]:
     """
     Create a payment intent for document analysis.
 
     Args:
         amount: Amount to charge in cents
+        document_id: ID of the document the payment unlocks
         currency: Currency code (default: "cny")
 
     Returns:
         Dict containing payment intent details
     """
-    payment_intent = create_payment_intent(amount, currency=currency)
+    payment_intent = create_payment_intent(amount, document_id, currency=currency)
     return {
         "client_secret": payment_intent.client_secret,
         "publishable_key": app.config["STRIPE_PUBLISHABLE_KEY"],
@@ -147,6 +346,144 @@ def _process_payment(amount: int, currency: str = "cny") -> Dict[str, Any]:
     }
 
 
+def _register_saved_upload(
+    save_path: str,
+    unique_filename: str,
+    original_filename: str,
+    mime_type: str,
+    content_hash: str,
+) -> Tuple[Response, int]:
+    """
+    Extract a saved upload, store its Document and create a payment intent.
+    Content seen before is not extracted again. The saved file is removed if
+    any step fails.
+
+    Args:
+        save_path: Path of the uploaded file inside the upload folder
+        unique_filename: Stored filename of the upload
+        original_filename: Filename as provided by the client
+        mime_type: MIME type reported by the client
+        content_hash: SHA-256 hex digest of the file content
+
+    Returns:
+        Tuple[Response, int]: JSON response and HTTP status code
+    """
+    # 1. Reuse an earlier extraction of identical content
+    matched_document = _find_extracted_document(content_hash)
+    if matched_document:
+        app.logger.info(f"♻️ Reusing text extracted for document {matched_document.id}")
+        if matched_document.char_count > app.config["MAX_ANALYSIS_CHARS"]:
+            os.remove(save_path)
+            return _too_long_response(matched_document.char_count)
+        try:
+            document = _create_document_from_match(
+                matched_document, unique_filename, original_filename, mime_type
+            )
+        except Exception as e:
+            if os.path.exists(save_path):
+                os.remove(save_path)
+            app.logger.error(f"⚠️ Database error: {str(e)}")
+            return jsonify({"error": "Failed to save document info"}), 500
+    else:
+        # 2. Process document and calculate cost
+        try:
+            document_metadata = process_document(save_path)
+            char_count = document_metadata["char_count"]
+            analysis_cost = _calculate_analysis_cost(char_count)
+            app.logger.info(f"💰 Analysis cost: ¥{analysis_cost / 100:.2f} for {char_count} characters")
+        except Exception as e:
+            if os.path.exists(save_path):
+                os.remove(save_path)
+            app.logger.error(f"⚠️ Processing error: {str(e)}")
+            return jsonify({"error": "Document processing failed"}), 500
+
+        # Refuse before quoting a price for text the model cannot take
+        if char_count > app.config["MAX_ANALYSIS_CHARS"]:
+            os.remove(save_path)
+            os.remove(document_metadata["text_content_file_path"])
+            return _too_long_response(char_count)
+
+        # 3. Database entry
+        try:
+            document = Document(
+                filename=unique_filename,
+                original_filename=original_filename,
+                file_size=os.path.getsize(save_path),
+                mime_type=mime_type,
+                char_count=char_count,
+                analysis_cost=analysis_cost,
+                title=document_metadata["title"],
+                text_content_file_path=document_metadata["text_content_file_path"],
+                content_hash=content_hash,
+            )
+            db.session.add(document)
+            db.session.commit()
+        except Exception as e:
+            if os.path.exists(save_path):
+                os.remove(save_path)
+            app.logger.error(f"⚠️ Database error: {str(e)}")
+            return jsonify({"error": "Failed to save document info"}), 500
+
+    # 4. Create payment intent and return response
+    try:
+        return jsonify(_document_response(document)), 200
+
+    except Exception as e:
+        if os.path.exists(save_path):
+            os.remove(save_path)
+        app.logger.error(f"⚠️ Payment error: {str(e)}")
+        return jsonify({"error": "Payment setup failed"}), 500
+
+
+def _read_memory_status_mb() -> Dict[str, float]:
+    """
+    Read the current (VmRSS) and peak (VmHWM) resident set size of this
+    worker from /proc.
+
+    Returns:
+        Dict[str, float]: Sizes in MB keyed by "rss" and "peak"
+    """
+    fields = {"VmRSS:": "rss", "VmHWM:": "peak"}
+    sizes = {}
+    with open(PROC_STATUS) as status:
+        for line in status:
+            parts = line.split()  # e.g. ["VmRSS:", "13528", "kB"]
+            if parts and parts[0] in fields:
+                sizes[fields[parts[0]]] = int(parts[1]) / 1024  # kB to MB
+    return sizes
+
+
+@app.before_request
+def _reset_peak_rss() -> None:
+    """
+    Reset the worker's recorded peak RSS before a document-heavy request, so
+    the peak read afterwards belongs to this request alone. Diagnostic only:
+    off unless LOG_PEAK_RSS is set, and only meaningful with one request per
+    process at a time, since the reset applies to the whole process.
+    """
+    if not app.config["LOG_PEAK_RSS"]:
+        return
+    if request.endpoint in MEMORY_TRACKED_ENDPOINTS and os.path.exists(PROC_CLEAR_REFS):
+        try:
+            with open(PROC_CLEAR_REFS, "w") as clear_refs:
+                clear_refs.write("5")  # 5 resets VmHWM to the current RSS
+            g.rss_before = _read_memory_status_mb()["rss"]
+        except (OSError, KeyError, ValueError) as e:
+            app.logger.warning(f"⚠️ Cannot reset peak RSS: {str(e)}")
+
+
+@app.after_request
+def _log_peak_rss(response: Response) -> Response:
+    """Log the peak RSS a document-heavy request reached and its growth."""
+    if "rss_before" in g:
+        peak_rss = _read_memory_status_mb()["peak"]
+        app.logger.info(
+            f"📈 Peak RSS during {request.endpoint}: {peak_rss:.1f} MB "
+            f"(+{peak_rss - g.rss_before:.1f} MB over start)"
+        )
+    return response
+
+
 @app.route("/")
 def index() -> str:
     """Render the main application page."""
@@ -182,72 +519,188 @@ def upload_file() -> Tuple[Response, int]:
             unique_filename, _ = _generate_unique_filename(file.filename)
             save_path = os.path.join(app.config["UPLOAD_FOLDER"], unique_filename)
             _save_uploaded_file(file, save_path)
+            content_hash = _compute_file_hash(save_path)
         except OSError as e:
             app.logger.error(f"⚠️ File save error: {str(e)}")
             return jsonify({"error": "Failed to save file"}), 500
 
-        # 3. Process document and calculate cost
-        try:
-            document_metadata = process_document(save_path)
-            char_count = document_metadata["char_count"]
-            analysis_cost = _calculate_analysis_cost(char_count)
-            app.logger.info(f"💰 Analysis cost: ¥{analysis_cost / 100:.2f} for {char_count} characters")
-        except Exception as e:
-            if save_path and os.path.exists(save_path):
-                os.remove(save_path)
-            app.logger.error(f"⚠️ Processing error: {str(e)}")
-            return jsonify({"error": "Document processing failed"}), 500
+        # 3. Extract text, store the document and quote the analysis
+        return _register_saved_upload(
+            save_path, unique_filename, file.filename, file.content_type, content_hash
+        )
 
-        # 4. Database entry
-        try:
-            document = Document(
-                filename=unique_filename,
-                original_filename=file.filename,
-                file_size=os.path.getsize(save_path),
-                mime_type=file.content_type,
-                char_count=char_count,
-                analysis_cost=analysis_cost,
-                title=document_metadata["title"],
-                text_content_file_path=document_metadata["text_content_file_path"]
-            )
-            db.session.add(document)
-            db.session.commit()
-        except Exception as e:
-            if save_path and os.path.exists(save_path):
-                os.remove(save_path)
-            app.logger.error(f"⚠️ Database error: {str(e)}")
-            return jsonify({"error": "Failed to save document info"}), 500
+    except Exception as e:
+        if save_path and os.path.exists(save_path):
+            os.remove(save_path)
+        app.logger.error(f"❌ Unexpected error: {str(e)}")
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
+
+@app.route("/upload/check", methods=["POST"])
+def check_upload() -> Tuple[Response, int]:
+    """
+    Pre-upload check: look up a document by the SHA-256 hash computed in the
+    browser so repeat submissions skip both the upload and the extraction.
+
+    Returns:
+        Tuple[Response, int]: JSON response and HTTP status code. When the
+        content is known the body matches /upload with "exists": true,
+        otherwise it is {"exists": false} and the client uploads the file.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        content_hash = str(data.get("sha256", "")).lower()
+        filename = data.get("filename", "")
+
+        if not re.fullmatch(r"[0-9a-f]{64}", content_hash):
+            return jsonify({"error": "Invalid SHA-256 hash"}), 400
+
+        if not filename or not _allowed_file(filename):
+            return jsonify({"error": "Invalid file type. Only PDF and DOCX files are allowed"}), 400
+
+        matched_document = _find_extracted_document(content_hash)
+        if not matched_document:
+            return jsonify({"exists": False}), 200
+
+        app.logger.info(f"♻️ Pre-upload hash matched document {matched_document.id}")
+        if matched_document.char_count > app.config["MAX_ANALYSIS_CHARS"]:
+            return _too_long_response(matched_document.char_count)
+        unique_filename, _ = _generate_unique_filename(filename)
+        document = _create_document_from_match(
+            matched_document,
+            unique_filename,
+            filename,
+            data.get("mime_type") or "application/octet-stream",
+        )
+        return jsonify({"exists": True, **_document_response(document)}), 200
+
+    except Exception as e:
+        app.logger.error(f"❌ Upload check error: {str(e)}")
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
+
+@app.route("/upload/chunked", methods=["POST"])
+def init_chunked_upload() -> Tuple[Response, int]:
+    """
+    Start a resumable chunked upload.
+
+    Expects JSON with filename, size, sha256 and optionally mime_type.
+
+    Returns:
+        Tuple[Response, int]: JSON with upload_id, chunk_size and total_chunks
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        filename = data.get("filename", "")
+        content_hash = str(data.get("sha256", "")).lower()
+
+        if not filename or not _allowed_file(filename):
+            return jsonify({"error": "Invalid file type. Only PDF and DOCX files are allowed"}), 400
+
+        if not re.fullmatch(r"[0-9a-f]{64}", content_hash):
+            return jsonify({"error": "Invalid SHA-256 hash"}), 400
 
-        # 5. Create payment intent and return response
         try:
-            payment_data = _process_payment(analysis_cost)
-            # Use current date if metadata date fails (fallback logic)
-            upload_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-            return jsonify({
-                "document_id": document.id,
-                "title": document_metadata["title"],
-                "original_filename": file.filename,
-                "char_count": char_count,
-                "file_size": os.path.getsize(save_path),
-                "mime_type": file.content_type,
-                "upload_date": upload_date,
-                "analysis_cost": analysis_cost,
-                "text_content_file_path": document_metadata["text_content_file_path"],
-                **payment_data
-            }), 200
+            file_size = int(data.get("size", 0))
+        except (TypeError, ValueError):
+            return jsonify({"error": "Invalid file size"}), 400
+
+        upload = create_upload(
+            filename,
+            file_size,
+            content_hash,
+            data.get("mime_type") or "application/octet-stream",
+        )
+        return jsonify({**upload, "received_chunks": []}), 200
+
+    except ChunkedUploadError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        app.logger.error(f"❌ Chunked upload init error: {str(e)}")
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
+
+@app.route("/upload/chunked/<upload_id>", methods=["GET"])
+def chunked_upload_status(upload_id: str) -> Tuple[Response, int]:
+    """
+    Report which chunks have been received, so an interrupted client can resume.
+
+    Returns:
+        Tuple[Response, int]: JSON upload metadata with received_chunks
+    """
+    upload = get_upload(upload_id)
+    if not upload:
+        return jsonify({"error": "Upload not found or expired"}), 404
+    return jsonify({**upload, "received_chunks": received_chunks(upload)}), 200
+
+
+@app.route("/upload/chunked/<upload_id>/<int:index>", methods=["PUT"])
+def append_chunk(upload_id: str, index: int) -> Tuple[Response, int]:
+    """
+    Store one chunk. The request body is the raw chunk bytes.
+
+    Returns:
+        Tuple[Response, int]: JSON response and HTTP status code
+    """
+    try:
+        upload = get_upload(upload_id)
+        if not upload:
+            return jsonify({"error": "Upload not found or expired"}), 404
+
+        write_chunk(upload, index, request.stream)
+        return jsonify({"upload_id": upload_id, "index": index}), 200
+
+    except ChunkedUploadError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        app.logger.error(f"❌ Chunk {index} of {upload_id} failed: {str(e)}")
+        return jsonify({"error": "Failed to save chunk"}), 500
 
-        except Exception as e:
-            if save_path and os.path.exists(save_path):
-                os.remove(save_path)
-            app.logger.error(f"⚠️ Payment error: {str(e)}")
-            return jsonify({"error": "Payment setup failed"}), 500
 
+@app.route("/upload/chunked/<upload_id>/complete", methods=["POST"])
+def complete_chunked_upload(upload_id: str) -> Tuple[Response, int]:
+    """
+    Assemble the chunks, verify the checksum and process the document the
+    same way as /upload.
+
+    Returns:
+        Tuple[Response, int]: JSON response and HTTP status code
+    """
+    upload = get_upload(upload_id)
+    if not upload:
+        return jsonify({"error": "Upload not found or expired"}), 404
+
+    # Only one worker may assemble a given upload
+    lock_key = f"chunked_upload_complete:{upload_id}"
+    if get_shared_state().incr(lock_key, ttl=app.config["CHUNKED_UPLOAD_TTL"]) > 1:
+        return jsonify({"error": "Upload is already being completed"}), 409
+
+    save_path = None
+    try:
+        unique_filename, _ = _generate_unique_filename(upload["filename"])
+        save_path = os.path.join(app.config["UPLOAD_FOLDER"], unique_filename)
+        assemble_upload(upload, save_path)
+        discard_upload(upload_id)
+
+        return _register_saved_upload(
+            save_path,
+            unique_filename,
+            upload["filename"],
+            upload["mime_type"],
+            upload["sha256"],
+        )
+
+    except ChecksumMismatchError as e:
+        return jsonify({"error": str(e), "code": "checksum_mismatch"}), 400
+    except ChunkedUploadError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         if save_path and os.path.exists(save_path):
             os.remove(save_path)
-        app.logger.error(f"❌ Unexpected error: {str(e)}")
+        app.logger.error(f"❌ Chunked upload completion error: {str(e)}")
         return jsonify({"error": "An unexpected error occurred"}), 500
+    finally:
+        get_shared_state().delete(lock_key)
 
 
 @app.route("/payment/success", methods=["POST"])
@@ -255,50 +708,157 @@ def payment_success() -> Tuple[Response, int]:
     """
     Handle successful payment and trigger document analysis.
 
+    Expects the payment intent's client_secret, which only the paying client
+    holds. The intent must have been created for the requested document and
+    charge its analysis cost. The response includes an access_token for GET
+    /documents/<id>/analysis.
+
     Returns:
         Tuple[Response, int]: JSON response and HTTP status code
     """
+    lock_key = None
     try:
-        data = request.get_json()
-        payment_intent_id = data.get("payment_intent_id")
+        data = request.get_json(silent=True) or {}
+        client_secret = data.get("client_secret")
         document_id = data.get("document_id")
         analysis_options = data.get("analysis_options", {})
 
-        if not payment_intent_id or not document_id:
+        if not client_secret or not document_id:
             return jsonify({"error": "Missing required parameters"}), 400
 
-        # Verify payment intent
+        # Verify payment intent and that the caller holds its client secret
+        payment_intent_id = client_secret.split("_secret_")[0]
         payment_intent = confirm_payment_intent(payment_intent_id)
+        if not hmac.compare_digest(payment_intent.client_secret or "", client_secret):
+            return jsonify({"error": "Invalid payment credentials"}), 403
         if payment_intent.status != "succeeded":
             return jsonify({"error": "Payment not successful"}), 400
 
+        # A retry for a payment that was already analyzed gets the stored result
+        stored_result = _find_analysis_result(document_id, payment_intent_id)
+        if stored_result:
+            app.logger.info(f"♻️ Serving stored analysis {stored_result.id}")
+            return jsonify(_paid_analysis_response(stored_result)), 200
+
+        # Only one request per payment may run the analysis
+        lock_key = f"payment_analysis:{payment_intent_id}"
+        if get_shared_state().incr(lock_key, ttl=app.config["ANALYSIS_LOCK_TTL"]) > 1:
+            lock_key = None  # held by the other request
+            return jsonify({"error": "Analysis is already in progress for this payment"}), 409
+
+        # The previous lock holder may have stored its result after the check above
+        stored_result = _find_analysis_result(document_id, payment_intent_id)
+        if stored_result:
+            app.logger.info(f"♻️ Serving stored analysis {stored_result.id}")
+            return jsonify(_paid_analysis_response(stored_result)), 200
+
         # Get document and create payment record
         document = Document.query.get(document_id)
         if not document:
             return jsonify({"error": "Document not found"}), 404
 
-        payment = Payment(
-            stripe_payment_id=payment_intent_id,
-            amount=payment_intent.amount,
-            currency=payment_intent.currency,
-            status=payment_intent.status,
-            document_id=document_id,
-        )
-        db.session.add(payment)
+        # The intent must have been created for this document at its price
+        if (
+            payment_intent.metadata.get("document_id") != str(document.id)
+            or payment_intent.amount != document.analysis_cost
+        ):
+            app.logger.warning(
+                f"🚫 Payment {payment_intent_id} does not match document {document.id}"
+            )
+            return jsonify({"error": "Payment does not match this document"}), 400
+
+        payment = Payment.query.filter_by(stripe_payment_id=payment_intent_id).first()
+        if payment and payment.document_id != document.id:
+            return jsonify({"error": "Payment belongs to another document"}), 400
+        if not payment:
+            payment = Payment(
+                stripe_payment_id=payment_intent_id,
+                amount=payment_intent.amount,
+                currency=payment_intent.currency,
+                status=payment_intent.status,
+                document_id=document.id,
+            )
+            db.session.add(payment)
+            # Commit now so the payment is recorded even if the analysis fails
+            db.session.commit()
 
-        # Read document content from the unique file
+        # Read document content from the unique file; the model request needs
+        # the whole text, so it is read once here and released after analysis
         text_content_file_path = document.text_content_file_path
         with open(text_content_file_path, "r", encoding="utf-8") as file:
             text_content = file.read()
 
         # Process document with AI by passing the document text content
         analysis_result = analyze_document(text_content, analysis_options)
-        document.analysis_summary = analysis_result["summary"]
+        del text_content
+
+        # Persist the result so reloads are served from storage
+        stored_result = AnalysisResult(
+            document_id=document.id,
+            payment_id=payment.id,
+            model_name=app.config["OPENAI_MODEL_NAME"],
+            temperature=app.config["OPENAI_TEMPERATURE"],
+            max_tokens=app.config["OPENAI_MAX_TOKENS"],
+            analysis_options=json.dumps(analysis_options),
+        )
+        for position, section in enumerate(analysis_result["sections"]):
+            analysis_section = AnalysisSection(position=position, name=section["name"])
+            analysis_section.content = section["content"]
+            stored_result.sections.append(analysis_section)
+        db.session.add(stored_result)
         db.session.commit()
 
         app.logger.info(f"✅ Document analysis completed for {document.id}")
-        return jsonify({"success": True, "analysis": analysis_result}), 200
-
+        return jsonify(_paid_analysis_response(stored_result)), 200
+
+    except IntegrityError:
+        # Another request stored this payment or its analysis first
+        db.session.rollback()
+        stored_result = _find_analysis_result(document_id, payment_intent_id)
+        if stored_result:
+            return jsonify(_paid_analysis_response(stored_result)), 200
+        app.logger.error("❌ Payment record conflict without a stored analysis")
+        return jsonify({"error": "Analysis is already in progress for this payment"}), 409
     except Exception as e:
+        db.session.rollback()
         app.logger.error(f"❌ Payment processing error: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+        return jsonify({"error": "Document analysis failed"}), 500
+    finally:
+        if lock_key:
+            get_shared_state().delete(lock_key)
+
+
+@app.route("/documents/<int:document_id>/analysis", methods=["GET"])
+def get_analysis(document_id: int) -> Tuple[Response, int]:
+    """
+    Return a stored analysis without running the model again.
+
+    Expects the access_token returned by /payment/success as an
+    "Authorization: Bearer <token>" header, which unlike a query parameter
+    stays out of access logs and browser history. Responses carry an ETag,
+    and a matching If-None-Match gets an empty 304 without decompressing the
+    stored sections.
+
+    Returns:
+        Tuple[Response, int]: JSON response and HTTP status code
+    """
+    authorization = request.authorization
+    access_token = authorization.token if authorization and authorization.type == "bearer" else None
+    if not access_token:
+        return jsonify({"error": "Missing required parameters"}), 400
+
+    stored_result = _find_analysis_by_token(document_id, access_token)
+    if not stored_result:
+        return jsonify({"error": "Analysis not found"}), 404
+
+    # Stored analyses never change, so the row id identifies the content
+    etag = f"analysis-{stored_result.id}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify({"success": True, **stored_result.to_dict()})
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add("Authorization")
+    return response, response.status_code
@@ -75,6 +75,13 @@ document.addEventListener('DOMContentLoaded', function() {
     let clientSecret;
     let currentAnalysis = null;
 
+    // Upload limits, matching MAX_CONTENT_LENGTH and MAX_UPLOAD_SIZE in app.py
+    const MAX_SINGLE_UPLOAD_SIZE = 20 * 1024 * 1024;
+    const MAX_UPLOAD_SIZE = 100 * 1024 * 1024;
+    const CHUNK_UPLOAD_THRESHOLD = 5 * 1024 * 1024;
+    const PARALLEL_CHUNKS = 3;
+    const CHUNK_RETRIES = 3;
+
     // Theme handling
     function initTheme() {
         const savedTheme = localStorage.getItem('theme') || 'light';
@@ -101,6 +108,9 @@ document.addEventListener('DOMContentLoaded', function() {
     // Initialize theme
     initTheme();
 
+    // Show the last paid analysis again after a reload
+    restoreLastAnalysis();
+
     // Drag and drop handlers
     ['dragenter', 'dragover'].forEach(eventName => {
         dropZone.addEventListener(eventName, (e) => {
@@ -136,7 +146,12 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
 
-        if (file.size > 20 * 1024 * 1024) {
+        if (file.size > MAX_UPLOAD_SIZE) {
+            showError('File size must be less than 100MB');
+            return;
+        }
+
+        if (file.size > MAX_SINGLE_UPLOAD_SIZE && !(window.crypto && window.crypto.subtle)) {
             showError('File size must be less than 20MB');
             return;
         }
@@ -145,9 +160,6 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     function uploadFile(file) {
-        const formData = new FormData();
-        formData.append('file', file);
-
         progressContainer.classList.remove('d-none');
         paymentContainer.classList.add('d-none');
         resultContainer.classList.add('d-none');
@@ -166,21 +178,34 @@ document.addEventListener('DOMContentLoaded', function() {
             }
         }, 100);
 
-        fetch('/upload', {
-            method: 'POST',
-            body: formData
-        })
-        .then(response => {
-            if (!response.ok) {
-                return response.json().then(data => {
-                    throw new Error(data.error || 'Error processing document');
+        hashFile(file)
+        .then(sha256 => findExistingDocument(file, sha256).then(existing => {
+            if (existing) return existing;
+
+            if (!sha256 && file.size > MAX_SINGLE_UPLOAD_SIZE) {
+                throw new Error('File size must be less than 20MB');
+            }
+
+            if (sha256 && file.size > CHUNK_UPLOAD_THRESHOLD) {
+                clearInterval(uploadInterval);
+                return uploadInChunks(file, sha256, (done, total) => {
+                    updateLoadingState('uploadStep', Math.round(30 * done / total));
                 });
             }
+
+            const formData = new FormData();
+            formData.append('file', file);
+
+            return fetch('/upload', {
+                method: 'POST',
+                body: formData
+            })
+            .then(parseJsonResponse);
+        }))
+        .then(data => {
             clearInterval(uploadInterval);
             updateLoadingState('processStep', 60);
-            return response.json();
-        })
-        .then(data => {
+
             // Show processing step
             setTimeout(() => {
                 updateLoadingState('analyzeStep', 90);
@@ -202,6 +227,149 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
+    function parseJsonResponse(response) {
+        return response.json().then(data => {
+            if (!response.ok) {
+                throw new Error(data.error || 'Error processing document');
+            }
+            return data;
+        });
+    }
+
+    // Resolves to the SHA-256 hex digest of the file, or null when Web Crypto
+    // is unavailable (e.g. the page is not served over HTTPS)
+    async function hashFile(file) {
+        if (!window.crypto || !window.crypto.subtle) return null;
+
+        try {
+            const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+            return Array.from(new Uint8Array(digest))
+                .map(byte => byte.toString(16).padStart(2, '0'))
+                .join('');
+        } catch (error) {
+            return null;
+        }
+    }
+
+    // Ask the server whether this exact content was already extracted.
+    // Resolves to the existing document's upload response, or null when
+    // the file has to be uploaded. A 4xx with an error (e.g. the document is
+    // too long to analyze) is thrown, since uploading would fail the same way.
+    async function findExistingDocument(file, sha256) {
+        if (!sha256) return null;
+
+        let response;
+        try {
+            response = await fetch('/upload/check', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({
+                    sha256: sha256,
+                    filename: file.name,
+                    mime_type: file.type
+                })
+            });
+        } catch (error) {
+            // Network failure: fall back to a normal upload
+            return null;
+        }
+
+        const data = await response.json().catch(() => null);
+        if (response.status >= 400 && response.status < 500 && data && data.error) {
+            throw new Error(data.error);
+        }
+        if (!response.ok || !data) return null;
+
+        return data.exists ? data : null;
+    }
+
+    // Upload a large file as chunks, several in parallel. The upload id is
+    // kept in localStorage per file hash, so retrying after a dropped
+    // connection only sends the chunks the server does not have yet.
+    async function uploadInChunks(file, sha256, onProgress) {
+        const storageKey = `chunkedUpload:${sha256}`;
+        let upload = null;
+
+        const savedUploadId = localStorage.getItem(storageKey);
+        if (savedUploadId) {
+            const response = await fetch(`/upload/chunked/${savedUploadId}`);
+            if (response.ok) {
+                upload = await response.json();
+            } else if (response.status === 404) {
+                localStorage.removeItem(storageKey);
+            }
+        }
+
+        if (!upload) {
+            upload = await fetch('/upload/chunked', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({
+                    filename: file.name,
+                    size: file.size,
+                    sha256: sha256,
+                    mime_type: file.type
+                })
+            }).then(parseJsonResponse);
+            localStorage.setItem(storageKey, upload.upload_id);
+        }
+
+        const received = new Set(upload.received_chunks);
+        const pending = [];
+        for (let index = 0; index < upload.total_chunks; index++) {
+            if (!received.has(index)) pending.push(index);
+        }
+        let done = received.size;
+        onProgress(done, upload.total_chunks);
+
+        const sendChunk = async (index) => {
+            const start = index * upload.chunk_size;
+            const chunk = file.slice(start, start + upload.chunk_size);
+            for (let attempt = 1; ; attempt++) {
+                try {
+                    const response = await fetch(`/upload/chunked/${upload.upload_id}/${index}`, {
+                        method: 'PUT',
+                        headers: {
+                            'Content-Type': 'application/octet-stream',
+                        },
+                        body: chunk
+                    });
+                    await parseJsonResponse(response);
+                    return;
+                } catch (error) {
+                    if (attempt >= CHUNK_RETRIES) throw error;
+                    await new Promise(resolve => setTimeout(resolve, 1000 * attempt));
+                }
+            }
+        };
+
+        const worker = async () => {
+            while (pending.length) {
+                await sendChunk(pending.shift());
+                onProgress(++done, upload.total_chunks);
+            }
+        };
+        await Promise.all(Array.from({ length: PARALLEL_CHUNKS }, worker));
+
+        const response = await fetch(`/upload/chunked/${upload.upload_id}/complete`, {
+            method: 'POST'
+        });
+        const result = await response.json();
+        // Keep the upload id on other errors (e.g. missing chunks) so the
+        // next attempt resumes; forget it once the server has dropped the parts
+        if (response.ok || response.status === 404 || result.code === 'checksum_mismatch') {
+            localStorage.removeItem(storageKey);
+        }
+        if (!response.ok) {
+            throw new Error(result.error || 'Error processing document');
+        }
+        return result;
+    }
+
     function updateDocumentMetadata(data) {
         // Show document info section
         const documentInfo = document.getElementById('documentInfo');
@@ -313,7 +481,7 @@ document.addEventListener('DOMContentLoaded', function() {
                     'Content-Type': 'application/json',
                 },
                 body: JSON.stringify({
-                    payment_intent_id: clientSecret.split('_secret_')[0],
+                    client_secret: clientSecret,
                     document_id: currentDocumentId,
                     analysis_options: getAnalysisOptions()
                 })
@@ -325,6 +493,12 @@ document.addEventListener('DOMContentLoaded', function() {
                 throw new Error(result.error || 'Error processing payment');
             }
 
+            // Remember the paid analysis so a reload can fetch it from the server
+            localStorage.setItem('lastAnalysis', JSON.stringify({
+                document_id: currentDocumentId,
+                token: result.access_token
+            }));
+
             paymentContainer.classList.add('d-none');
             showResults(result);
             showToast('Payment successful', 'success');
@@ -336,6 +510,35 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
+    function restoreLastAnalysis() {
+        const saved = localStorage.getItem('lastAnalysis');
+        if (!saved) return;
+
+        let lastAnalysis;
+        try {
+            lastAnalysis = JSON.parse(saved);
+        } catch (error) {
+            localStorage.removeItem('lastAnalysis');
+            return;
+        }
+
+        fetch(`/documents/${lastAnalysis.document_id}/analysis`, {
+            headers: { 'Authorization': `Bearer ${lastAnalysis.token}` }
+        })
+        .then(response => {
+            if (response.status === 404) {
+                localStorage.removeItem('lastAnalysis');
+            }
+            return response.ok ? response.json() : null;
+        })
+        .then(data => {
+            if (data) showResults(data);
+        })
+        .catch(() => {
+            // Keep the saved reference and try again on the next load
+        });
+    }
+
     function getAnalysisOptions() {
         return {
             characterAnalysis: document.getElementById('characterAnalysis').checked,
@@ -1,16 +1,62 @@
 from openai import OpenAI
 from app import app
 import os
+import re
 
 
 # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
 # do not change this unless explicitly requested by the user
 
-client = OpenAI(api_key=app.config["OPENAI_API_KEY"])
+client = OpenAI(
+    api_key=app.config["OPENAI_API_KEY"],
+    max_retries=app.config["OPENAI_MAX_RETRIES"],
+)
 
 
 # utils/ai_analyzer.py
 
+# Section headings the analysis is split into, in display order
+ANALYSIS_SECTIONS = [
+    "摘要",
+    "人物分析",
+    "情节分析",
+    "主题分析",
+    "可读性评估",
+    "情感分析",
+    "风格和一致性",
+]
+
+# Matches a heading line such as "人物分析：", "**人物分析：**" or "### 人物分析:"
+_SECTION_HEADING = re.compile(
+    r"^[#*\s]*(" + "|".join(ANALYSIS_SECTIONS) + r")[*\s]*[：:][*\s]*(.*)$"
+)
+
+
+def split_analysis_sections(analysis):
+    """
+    Split analysis text into its headed sections.
+
+    Args:
+        analysis (str): Cleaned analysis text returned by the model
+
+    Returns:
+        list: Dicts with "name" and "content" in document order. Text before
+        the first heading is kept as a section with an empty name.
+    """
+    sections = []
+    name, lines = "", []
+    for line in analysis.split("\n"):
+        match = _SECTION_HEADING.match(line)
+        if match:
+            if name or "\n".join(lines).strip():
+                sections.append({"name": name, "content": "\n".join(lines).strip()})
+            name, lines = match.group(1), [match.group(2)]
+        else:
+            lines.append(line)
+    if name or "\n".join(lines).strip():
+        sections.append({"name": name, "content": "\n".join(lines).strip()})
+    return sections
+
 
 def analyze_document(text_content, analysis_options=None):
     """Analyze document content using OpenAI GPT-4o."""
@@ -71,14 +117,17 @@ def analyze_document(text_content, analysis_options=None):
             ],
             temperature=app.config["OPENAI_TEMPERATURE"],
             max_tokens=app.config["OPENAI_MAX_TOKENS"],
+            timeout=app.config["OPENAI_TIMEOUT"],
         )
 
         # debug message content that was sent to OpenAI, by outputting the system prompt and user content
         # to debug/ai_analyzer_request.txt
+        # written piece by piece so the document text is not copied into a new string
         with open(
             os.path.join(app.config["DEBUG_DIR"], "ai_analyzer_request.txt"), "w"
         ) as f:
-            f.write(f"System Prompt:\n{system_prompt}\n\nUser Content:\n{text_content}")
+            f.write(f"System Prompt:\n{system_prompt}\n\nUser Content:\n")
+            f.write(text_content)
 
         analysis = response.choices[0].message.content.strip()
         app.logger.info("📥 Received response from OpenAI")
@@ -102,20 +151,14 @@ def analyze_document(text_content, analysis_options=None):
         )
 
         # Ensure each section has content
-        sections_to_check = [
-            "摘要",
-            "人物分析",
-            "情节分析",
-            "主题分析",
-            "可读性评估",
-            "情感分析",
-            "风格和一致性",
-        ]
-        for section in sections_to_check:
+        for section in ANALYSIS_SECTIONS:
             if f"{section}：\n暂无内容" in cleaned_analysis:
                 app.logger.warning(f"⚠️ Empty content detected in section: {section}")
 
-        return {"summary": cleaned_analysis}
+        return {
+            "summary": cleaned_analysis,
+            "sections": split_analysis_sections(cleaned_analysis),
+        }
     except Exception as e:
         app.logger.error(f"❌ Error analyzing document: {str(e)}")
         raise Exception(f"Error analyzing document: {str(e)}")
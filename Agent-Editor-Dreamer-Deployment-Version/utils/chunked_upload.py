@@ -0,0 +1,211 @@
+"""
+@file-overview Resumable chunked uploads assembled on disk
+@filepath utils/chunked_upload.py
+
+A large file is uploaded as fixed-size chunks that may arrive in any order
+and from any worker. Each chunk is written to its own part file under
+CHUNKED_UPLOAD_FOLDER/<upload_id>/, so a client that loses its connection
+only re-sends the chunks that are missing. Upload metadata lives in the
+shared state backend so every worker sees the same uploads.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import time
+import uuid
+from typing import Any, Dict, IO, List, Optional
+
+from app import app
+from utils.shared_state import get_shared_state
+
+_STATE_KEY = "chunked_upload:{}"
+_COPY_BUFFER_SIZE = 64 * 1024
+
+
+class ChunkedUploadError(Exception):
+    """Raised when a chunked upload request is invalid."""
+
+
+class ChecksumMismatchError(ChunkedUploadError):
+    """Raised when the assembled file does not match the announced SHA-256."""
+
+
+def _upload_dir(upload_id: str) -> str:
+    return os.path.join(app.config["CHUNKED_UPLOAD_FOLDER"], upload_id)
+
+
+def _part_path(upload_id: str, index: int) -> str:
+    return os.path.join(_upload_dir(upload_id), f"{index:05d}.part")
+
+
+def _expected_chunk_size(upload: Dict[str, Any], index: int) -> int:
+    if index < upload["total_chunks"] - 1:
+        return upload["chunk_size"]
+    return upload["file_size"] - upload["chunk_size"] * (upload["total_chunks"] - 1)
+
+
+def create_upload(
+    filename: str, file_size: int, content_hash: str, mime_type: str
+) -> Dict[str, Any]:
+    """
+    Register a new chunked upload.
+
+    Args:
+        filename: Original filename of the document
+        file_size: Total size of the file in bytes
+        content_hash: SHA-256 hex digest of the complete file
+        mime_type: MIME type reported by the client
+
+    Returns:
+        dict: Upload metadata including upload_id, chunk_size and total_chunks
+
+    Raises:
+        ChunkedUploadError: If the file size is out of bounds
+    """
+    if file_size <= 0:
+        raise ChunkedUploadError("File is empty")
+    if file_size > app.config["MAX_UPLOAD_SIZE"]:
+        max_mb = app.config["MAX_UPLOAD_SIZE"] // (1024 * 1024)
+        raise ChunkedUploadError(f"File size must be less than {max_mb}MB")
+
+    purge_stale_uploads()
+
+    chunk_size = app.config["CHUNK_SIZE"]
+    upload = {
+        "upload_id": uuid.uuid4().hex,
+        "filename": filename,
+        "mime_type": mime_type,
+        "file_size": file_size,
+        "sha256": content_hash,
+        "chunk_size": chunk_size,
+        "total_chunks": -(-file_size // chunk_size),
+    }
+    os.makedirs(_upload_dir(upload["upload_id"]))
+    get_shared_state().set(
+        _STATE_KEY.format(upload["upload_id"]),
+        upload,
+        ttl=app.config["CHUNKED_UPLOAD_TTL"],
+    )
+    app.logger.info(
+        f"📦 Chunked upload {upload['upload_id']} started: "
+        f"{upload['total_chunks']} chunks for {filename}"
+    )
+    return upload
+
+
+def get_upload(upload_id: str) -> Optional[Dict[str, Any]]:
+    """Return the metadata of an unexpired upload, or None."""
+    if not re.fullmatch(r"[0-9a-f]{32}", upload_id):
+        return None
+    upload = get_shared_state().get(_STATE_KEY.format(upload_id))
+    if upload and os.path.isdir(_upload_dir(upload_id)):
+        return upload
+    return None
+
+
+def received_chunks(upload: Dict[str, Any]) -> List[int]:
+    """Return the sorted indexes of the chunks already stored for an upload."""
+    return sorted(
+        int(name.split(".", 1)[0])
+        for name in os.listdir(_upload_dir(upload["upload_id"]))
+        if name.endswith(".part")
+    )
+
+
+def write_chunk(upload: Dict[str, Any], index: int, stream: IO[bytes]) -> None:
+    """
+    Stream one chunk to disk. Re-sending a chunk overwrites the earlier copy.
+
+    Args:
+        upload: Upload metadata from get_upload()
+        index: Zero-based chunk index
+        stream: Readable binary stream with the chunk body
+
+    Raises:
+        ChunkedUploadError: If the index or the chunk size is wrong
+    """
+    if not 0 <= index < upload["total_chunks"]:
+        raise ChunkedUploadError(f"Chunk index {index} out of range")
+
+    expected_size = _expected_chunk_size(upload, index)
+    part_path = _part_path(upload["upload_id"], index)
+    # Write to a private temp file so a parallel retry of the same chunk
+    # never leaves a half-written part behind
+    tmp_path = f"{part_path}.{uuid.uuid4().hex}.tmp"
+    written = 0
+    try:
+        with open(tmp_path, "wb") as part_file:
+            for block in iter(lambda: stream.read(_COPY_BUFFER_SIZE), b""):
+                written += len(block)
+                if written > expected_size:
+                    break
+                part_file.write(block)
+        if written != expected_size:
+            raise ChunkedUploadError(
+                f"Chunk {index} must be {expected_size} bytes, got {written}"
+            )
+        os.replace(tmp_path, part_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def assemble_upload(upload: Dict[str, Any], save_path: str) -> None:
+    """
+    Concatenate all chunks into save_path and verify the SHA-256 checksum.
+
+    Args:
+        upload: Upload metadata from get_upload()
+        save_path: Destination path of the assembled file
+
+    Raises:
+        ChunkedUploadError: If chunks are missing or the checksum does not match.
+            On a checksum mismatch the stored chunks are discarded, since the
+            client has to upload the file again anyway.
+    """
+    missing = sorted(
+        set(range(upload["total_chunks"])) - set(received_chunks(upload))
+    )
+    if missing:
+        raise ChunkedUploadError(f"Missing chunks: {missing}")
+
+    digest = hashlib.sha256()
+    try:
+        with open(save_path, "wb") as output:
+            for index in range(upload["total_chunks"]):
+                with open(_part_path(upload["upload_id"], index), "rb") as part_file:
+                    for block in iter(lambda: part_file.read(_COPY_BUFFER_SIZE), b""):
+                        digest.update(block)
+                        output.write(block)
+        if digest.hexdigest() != upload["sha256"]:
+            discard_upload(upload["upload_id"])
+            raise ChecksumMismatchError("Checksum mismatch, please upload the file again")
+    except Exception:
+        if os.path.exists(save_path):
+            os.remove(save_path)
+        raise
+    app.logger.info(f"✅ Chunked upload {upload['upload_id']} assembled at {save_path}")
+
+
+def discard_upload(upload_id: str) -> None:
+    """Remove the chunks and metadata of an upload."""
+    get_shared_state().delete(_STATE_KEY.format(upload_id))
+    shutil.rmtree(_upload_dir(upload_id), ignore_errors=True)
+
+
+def purge_stale_uploads() -> None:
+    """Remove chunk directories of uploads abandoned for longer than the TTL."""
+    get_shared_state().purge_expired()
+    chunk_root = app.config["CHUNKED_UPLOAD_FOLDER"]
+    cutoff = time.time() - app.config["CHUNKED_UPLOAD_TTL"]
+    for upload_id in os.listdir(chunk_root):
+        upload_dir = os.path.join(chunk_root, upload_id)
+        try:
+            if os.path.getmtime(upload_dir) < cutoff:
+                discard_upload(upload_id)
+                app.logger.info(f"🧹 Removed stale chunked upload {upload_id}")
+        except OSError:
+            # Another worker removed it first
+            continue
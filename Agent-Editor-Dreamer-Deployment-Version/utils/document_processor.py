@@ -20,7 +20,9 @@ def process_document(file_path):
         file_path (str): The path to the document file to be processed.
 
     Returns:
-        dict: A dictionary containing the text content and metadata of the document.
+        dict: A dictionary containing the metadata of the document and the path
+        of the file holding its text content. The text itself is not returned,
+        so callers read it from disk only when they need it.
 
     Raises:
         Exception: If all document processing methods fail.
@@ -30,6 +32,7 @@ def process_document(file_path):
     debug_dir = app.config["DEBUG_DIR"]
 
     text_content = None
+    pypdf_pages = None
     error_messages = []
 
     # Try MarkItDown first
@@ -46,32 +49,35 @@ def process_document(file_path):
         error_messages.append(f"MarkItDown failed: {str(e)}")
         app.logger.warning(f"⚠️ MarkItDown failed, attempting pypdf fallback: {str(e)}")
 
-        # Try pypdf as fallback
-        try:
-            text_content = _extract_text_with_pypdf(file_path)
-            app.logger.info("✅ pypdf fallback successful")
-        except Exception as e:
-            error_messages.append(f"pypdf fallback failed: {str(e)}")
-            app.logger.error(f"❌ pypdf fallback failed: {str(e)}")
+        # Try pypdf as fallback, extracting pages lazily while writing
+        pypdf_pages = _iter_text_with_pypdf(file_path)
 
-    # If all methods failed
-    if text_content is None:
-        raise Exception(
-            f"All document processing methods failed:\n" + "\n".join(error_messages)
-        )
-
-    # Save debug output with a unique filename
+    # Save the text content with a unique filename
     unique_filename = f"text_content_{uuid.uuid4().hex}.txt"
     text_content_file_path = os.path.join(debug_dir, unique_filename)
     try:
         with open(text_content_file_path, "w", encoding="utf-8") as text_file:
-            text_file.write(text_content)
+            if text_content is not None:
+                text_file.write(text_content)
+                char_count = len(text_content)
+            else:
+                # Pages are written as they are extracted, so the fallback
+                # never holds the whole text in memory
+                char_count = 0
+                for page_text in pypdf_pages:
+                    text_file.write(page_text)
+                    char_count += len(page_text)
         app.logger.info(f"✅ Text content saved to {text_content_file_path}")
     except Exception as e:
-        app.logger.error(f"❌ Failed to save debug output: {str(e)}")
+        if os.path.exists(text_content_file_path):
+            os.remove(text_content_file_path)
+        error_messages.append(f"Text extraction failed: {str(e)}")
+        app.logger.error(f"❌ Failed to extract text content: {str(e)}")
+        raise Exception(
+            f"All document processing methods failed:\n" + "\n".join(error_messages)
+        )
 
     # Process metadata
-    char_count = len(text_content)
     meta_title = os.path.splitext(os.path.basename(file_path))[0]
     meta_title = meta_title.rsplit("_", 1)[0]  # Strip UUID
 
@@ -83,7 +89,6 @@ def process_document(file_path):
     app.logger.info(f"📝 Upload date: {meta_date}")
 
     return {
-        "text_content": text_content,
         "char_count": char_count,
         "title": meta_title,
         "date_of_upload": meta_date,
@@ -91,22 +96,21 @@ def process_document(file_path):
     }
 
 
-def _extract_text_with_pypdf(file_path):
+def _iter_text_with_pypdf(file_path):
     """
-    Extract text from PDF using pypdf as a fallback method.
+    Extract text from PDF page by page using pypdf as a fallback method.
 
     Args:
         file_path (str): Path to the PDF file
 
-    Returns:
-        str: Extracted text content
+    Yields:
+        str: Extracted text of one page, followed by a newline
     """
     try:
         reader = PdfReader(file_path)
-        text_content = ""
         for page in reader.pages:
-            text_content += page.extract_text() + "\n"
-        return text_content
+            yield page.extract_text() + "\n"
+        app.logger.info("✅ pypdf fallback successful")
     except Exception as e:
         app.logger.error(f"❌ pypdf extraction failed: {str(e)}")
         raise
@@ -0,0 +1,230 @@
+"""
+@file-overview Cross-worker shared state for caches, counters and job state
+@filepath utils/shared_state.py
+
+Module-level globals are private to each gunicorn worker, so anything that
+must be visible to every worker (cached lookups, rate limit counters, the
+status of a running analysis) goes through the backend returned by
+get_shared_state().
+
+The backend is selected with the SHARED_STATE_URL setting:
+- sqlite:///<path>  WAL-mode SQLite file, shared by all workers on one host
+- redis://...       Redis server, shared across hosts (requires the redis package)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+from app import app
+
+
+class SharedState(ABC):
+    """Interface implemented by every shared state backend."""
+
+    @abstractmethod
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the JSON-decoded value stored under key, or default."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Store a JSON-serializable value, optionally expiring after ttl seconds."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove key if present."""
+
+    @abstractmethod
+    def incr(self, key: str, amount: int = 1, ttl: Optional[int] = None) -> int:
+        """
+        Atomically add amount to an integer counter and return the new value.
+
+        The ttl only applies when the counter is created, which gives
+        fixed-window semantics for rate limiting.
+        """
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """Delete expired entries and return how many were removed."""
+
+
+class SQLiteSharedState(SharedState):
+    """Shared state stored in a WAL-mode SQLite file."""
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS shared_state ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout_ms / 1000,
+                isolation_level=None,
+            )
+            apply_sqlite_pragmas(conn, self.busy_timeout_ms)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str, default: Any = None) -> Any:
+        row = self._connection().execute(
+            "SELECT value FROM shared_state "
+            "WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        self._connection().execute(
+            "INSERT OR REPLACE INTO shared_state (key, value, expires_at) "
+            "VALUES (?, ?, ?)",
+            (key, json.dumps(value), expires_at),
+        )
+
+    def delete(self, key: str) -> None:
+        self._connection().execute("DELETE FROM shared_state WHERE key = ?", (key,))
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[int] = None) -> int:
+        conn = self._connection()
+        now = time.time()
+        # BEGIN IMMEDIATE takes the write lock up front so concurrent
+        # workers serialize on the busy timeout instead of failing
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT value FROM shared_state "
+                "WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, now),
+            ).fetchone()
+            if row:
+                value = int(json.loads(row[0])) + amount
+                conn.execute(
+                    "UPDATE shared_state SET value = ? WHERE key = ?",
+                    (json.dumps(value), key),
+                )
+            else:
+                value = amount
+                conn.execute(
+                    "INSERT OR REPLACE INTO shared_state (key, value, expires_at) "
+                    "VALUES (?, ?, ?)",
+                    (key, json.dumps(value), now + ttl if ttl else None),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return value
+
+    def purge_expired(self) -> int:
+        cursor = self._connection().execute(
+            "DELETE FROM shared_state WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (time.time(),),
+        )
+        return cursor.rowcount
+
+
+_REDIS_INCR_SCRIPT = """
+local value = redis.call('INCRBY', KEYS[1], ARGV[1])
+if tonumber(ARGV[2]) > 0 and redis.call('TTL', KEYS[1]) == -1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return value
+"""
+
+
+class RedisSharedState(SharedState):
+    """Shared state stored in Redis, for deployments spanning several hosts."""
+
+    def __init__(self, url: str, prefix: str = "dreamer:"):
+        import redis  # optional dependency, only needed for this backend
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._incr_script = self.client.register_script(_REDIS_INCR_SCRIPT)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else default
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[int] = None) -> int:
+        # One script so the counter and its expiry are set atomically; a
+        # worker dying between INCRBY and EXPIRE would leave a key that never
+        # expires, e.g. a completion lock held forever
+        return self._incr_script(keys=[self.prefix + key], args=[amount, ttl or 0])
+
+    def purge_expired(self) -> int:
+        # Redis evicts expired keys itself
+        return 0
+
+
+def apply_sqlite_pragmas(conn: sqlite3.Connection, busy_timeout_ms: int) -> None:
+    """
+    Tune a SQLite connection for several concurrent writer processes.
+
+    WAL lets readers proceed while a write is in progress, and the busy
+    timeout makes a blocked writer wait instead of raising "database is locked".
+    """
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+_shared_state = None
+_shared_state_lock = threading.Lock()
+
+
+def create_shared_state(url: str) -> SharedState:
+    """
+    Create a shared state backend from a URL.
+
+    Args:
+        url: Backend URL, e.g. sqlite:////srv/app/instance/shared_state.db
+
+    Returns:
+        SharedState: The configured backend
+
+    Raises:
+        ValueError: If the URL scheme is not supported
+    """
+    if url.startswith("sqlite:///"):
+        return SQLiteSharedState(
+            url[len("sqlite:///"):], app.config["SQLITE_BUSY_TIMEOUT_MS"]
+        )
+    if url.startswith(("redis://", "rediss://")):
+        return RedisSharedState(url)
+    raise ValueError(f"Unsupported shared state backend: {url}")
+
+
+def get_shared_state() -> SharedState:
+    """Return the process-wide shared state backend, creating it on first use."""
+    global _shared_state
+    if _shared_state is None:
+        with _shared_state_lock:
+            if _shared_state is None:
+                _shared_state = create_shared_state(app.config["SHARED_STATE_URL"])
+                _shared_state.purge_expired()
+    return _shared_state
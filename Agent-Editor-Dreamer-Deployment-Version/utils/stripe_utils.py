@@ -10,12 +10,13 @@ from app import app
 stripe.api_key = app.config["STRIPE_SECRET_KEY"]
 
 
-def create_payment_intent(amount, currency="cny"):
+def create_payment_intent(amount, document_id, currency="cny"):
     """
     Create a payment intent for document analysis.
 
     Args:
         amount (int): The amount to charge in the smallest currency unit (e.g., cents).
+        document_id (int): The document the payment is for, kept in the intent metadata.
         currency (str): The currency code (default is 'cny').
 
     Returns:
@@ -30,7 +31,7 @@ def create_payment_intent(amount, currency="cny"):
             currency=currency,
             automatic_payment_methods={"enabled": True},
             payment_method_configuration=app.config["STRIPE_PAYMENT_METHOD_CONFIG"],
-            metadata={"service": "document_analysis"},
+            metadata={"service": "document_analysis", "document_id": str(document_id)},
         )
         return intent
     except stripe.error.StripeError as e: